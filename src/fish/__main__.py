@@ -11,7 +11,7 @@ from .book_manager import BookManager
 def main():
     app = QApplication(sys.argv)
     from .config import app_data_dir, config
-    from .theme_manager import apply_theme_to_app
+    from .theme_manager import ThemeWatcher, apply_theme_to_app, install_theme_change_listener
     
     # Apply theme to the application
     apply_theme_to_app(app)
@@ -41,8 +41,11 @@ def main():
         # 如果没有打开的书，提示选择文件
         if not book_manager.has_opened_book():
             logging.info("No book found in bookshelf, prompting user for file selection")
+            # 跳过原生对话框的图标/stat 探测，网络盘上打开快得多
             file_path, _ = QFileDialog.getOpenFileName(
-                None, "选择文本文件", "", "Text Files (*.txt)"
+                None, "选择文本文件", "", "Text Files (*.txt)",
+                options=(QFileDialog.Option.DontUseNativeDialog
+                         | QFileDialog.Option.DontUseCustomDirectoryIcons),
             )
             if not file_path:
                 logging.info("User cancelled file selection, exiting application")
@@ -71,10 +74,19 @@ def main():
         window.show()
         logging.info("Floating window displayed successfully")
 
+        # 后台定期重测系统主题，检测到切换时重新套用配色
+        theme_watcher = ThemeWatcher(app)
+        theme_watcher.themeChanged.connect(lambda _theme: apply_theme_to_app(app))
+        theme_watcher.themeChanged.connect(lambda _theme: window.update_theme())
+        # 能注册到系统原生通知就停掉轮询，事件驱动、稳态零开销
+        theme_listener = install_theme_change_listener(app, theme_watcher.recheck)
+        if theme_listener is not None:
+            theme_watcher.stop_polling()
+
         sys.exit(app.exec())
     finally:
         # 程序退出时确保保存数据
-        book_manager.save()
+        book_manager.flush_now()
         # 保存配置
         config.save()
         logging.info("Application data saved and application terminated")
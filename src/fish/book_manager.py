@@ -1,7 +1,13 @@
+import bisect
+import hashlib
+from array import array
 import json
 import logging
+import mmap
 import os
 import re
+import sys
+import time
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -10,15 +16,88 @@ from .config import bookshelf, config
 # Set up module-specific logger
 logger = logging.getLogger(__name__)
 
+# 匹配句子：内容 + 标点(。？！) + 可选引号("")
+_SENTENCE_RE = re.compile(r'[^。？！]+[。？！]["”]?')
+_sentence_finditer = _SENTENCE_RE.finditer
+# _smart_split 的断行标点
+_PUNCT_CHARS = '，；：、。？！'
+# 显示段落的最大长度（两行，每行取一半）
+_MAX_LINE_LENGTH = 66
+
 
 class BookManager:
     def __init__(self, app_data_dir: Path):
-        self.line_mapping = {}  # Maps display_line_index -> actual_line_number
-        self.reverse_line_mapping = {}  # Maps actual_line_number -> [display_line_indices]
+        # 显示行索引 -> 实际行号的单调数组（array 每项 4 字节，远小于 dict/list）；
+        # 正向查找按下标索引，反向查找二分
+        self.line_mapping = array('i')
         self.app_data_dir = app_data_dir
         self.bookshelf = bookshelf
-        self.current_book_path = self._get_current_book_path()
         self._needs_save = False
+        # 书籍条目集中在 books 子字典下，与 current_book 键分离
+        self._books = self._migrate_bookshelf()
+        self.current_book_path = self._get_current_book_path()
+        self._validated_path: Optional[str] = None  # 最近一次 stat 验证通过的路径
+        self._current_stat: Optional[os.stat_result] = None  # 对应的 stat 结果
+        # 保存合并：间隔内的重复 save() 直接返回，至多每 5 秒落盘一次
+        self._last_save_ts = 0.0
+        self._save_interval = 5.0
+        self._line_count_cache: Dict[tuple, int] = {}  # (path, mtime_ns, size) -> 行数
+        # 进度日志：每次更新只追加几个字节，退出时才整体重写 JSON
+        self._progress_log_path = app_data_dir / "progress.log"
+        self._progress_log = None
+        self._last_logged_progress = -1
+        self._last_log_time = 0.0
+        self._replay_progress_log()
+
+    def _migrate_bookshelf(self) -> Dict[str, dict]:
+        """旧版书架把书籍路径和 current_book 混在顶层；迁移到 books 子字典"""
+        books = self.bookshelf.get("books")
+        if books is None:
+            books = {}
+            legacy_keys = [k for k in self.bookshelf if k != "current_book"]
+            for key in legacy_keys:
+                books[key] = self.bookshelf[key]
+                del self.bookshelf[key]
+            self.bookshelf["books"] = books
+            if legacy_keys:
+                self._needs_save = True
+                logger.info("Migrated %s bookshelf entries into 'books'", len(legacy_keys))
+        return books
+
+    def _replay_progress_log(self):
+        """回放进度日志，恢复上次会话未写入书架快照的进度"""
+        try:
+            with open(self._progress_log_path, 'r', encoding='utf-8') as f:
+                entries = f.read().splitlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.error(f"Error reading progress log: {e}")
+            return
+
+        replayed = 0
+        for entry in entries:
+            path, sep, progress = entry.rpartition('\t')
+            if not sep or path not in self._books:
+                continue
+            try:
+                self._books[path]["progress"] = int(progress)
+                replayed += 1
+            except (ValueError, TypeError):
+                continue
+        if replayed:
+            self._needs_save = True
+            logger.info(f"Replayed {replayed} progress entries from log")
+
+    def _append_progress_log(self, file_path: str, line_number: int):
+        """将一次进度更新追加到日志（几个字节），避免整本书架重写"""
+        try:
+            if self._progress_log is None:
+                self._progress_log = open(self._progress_log_path, 'a', encoding='utf-8')
+            self._progress_log.write(f"{file_path}\t{line_number}\n")
+            self._progress_log.flush()
+        except OSError as e:
+            logger.error(f"Error appending to progress log: {e}")
 
     def _get_current_book_path(self) -> Optional[str]:
         """获取当前打开的书籍路径"""
@@ -27,27 +106,35 @@ class BookManager:
     def has_opened_book(self) -> bool:
         """检查是否有打开的书"""
         current_book = self._get_current_book_path()
-        logger.info(f"Checking if book is opened, current book: {current_book}")
+        logger.info("Checking if book is opened, current book: %s", current_book)
         # Also validate that the current book is in the bookshelf dict
-        if current_book and current_book in self.bookshelf:
-            exists = os.path.exists(current_book)
-            logger.info(f"Book exists check result: {exists}")
-            return exists
+        if current_book and current_book in self._books:
+            try:
+                self._current_stat = os.stat(current_book)
+            except OSError:
+                logger.info("Book exists check result: False")
+                return False
+            logger.info("Book exists check result: True")
+            self._validated_path = current_book
+            return True
         logger.info("No current book found in bookshelf")
         return False
 
     def add_book(self, file_path: str):
         """将书籍添加到书架"""
         logger.info(f"Attempting to add book to bookshelf: {file_path}")
-        if not os.path.exists(file_path):
+        try:
+            st = os.stat(file_path)
+        except OSError:
             logger.error(f"File does not exist: {file_path}")
             raise FileNotFoundError(f"File does not exist: {file_path}")
 
-        if file_path not in self.bookshelf:
+        if file_path not in self._books:
             total_lines = self._count_lines(file_path)
-            self.bookshelf[file_path] = {
+            self._books[file_path] = {
                 "progress": 0,
-                "total_lines": total_lines
+                "total_lines": total_lines,
+                "size": st.st_size
             }
             self._needs_save = True
             logger.info(f"Book added to bookshelf: {file_path} with {total_lines} lines")
@@ -57,86 +144,137 @@ class BookManager:
     def set_current_book(self, file_path: str):
         """设置当前书籍"""
         logger.info(f"Setting current book to: {file_path}")
-        if not os.path.exists(file_path):
+        try:
+            self._current_stat = os.stat(file_path)
+        except OSError:
             logger.error(f"File does not exist: {file_path}")
             raise FileNotFoundError(f"File does not exist: {file_path}")
 
         self.current_book_path = file_path
+        self._validated_path = file_path
         self.bookshelf["current_book"] = file_path
         self._needs_save = True
         logger.info(f"Current book set successfully: {file_path}")
 
     def get_current_progress(self) -> int:
         """获取当前进度"""
-        logger.debug(f"Getting current progress for book: {self.current_book_path}")
+        logger.debug("Getting current progress for book: %s", self.current_book_path)
         # Validate that the current book path exists in bookshelf and file exists
-        if (self.current_book_path and
-                self.current_book_path in self.bookshelf and
-                os.path.exists(self.current_book_path)):
-            progress = self.bookshelf[self.current_book_path].get("progress", 0)
-            logger.debug(f"Current progress: {progress}")
+        if (self.current_book_path == self._validated_path and
+                self.current_book_path in self._books):
+            progress = self._books[self.current_book_path].get("progress", 0)
+            logger.debug("Current progress: %s", progress)
             return progress
         logger.warning("No current book or book not in bookshelf, returning 0 progress")
         return 0
 
     def update_progress(self, line_number: int):
         """更新阅读进度"""
-        logger.debug(f"Updating progress to line: {line_number} for book: {self.current_book_path}")
+        logger.debug("Updating progress to line: %s for book: %s", line_number, self.current_book_path)
         # Validate that the current book path exists in bookshelf and file exists
-        if (self.current_book_path and
-                self.current_book_path in self.bookshelf and
-                os.path.exists(self.current_book_path)):
-            self.bookshelf[self.current_book_path]["progress"] = line_number
+        if (self.current_book_path == self._validated_path and
+                self.current_book_path in self._books):
+            self._books[self.current_book_path]["progress"] = line_number
             # Only mark for save if auto_save_progress is enabled
             if config.get('auto_save_progress', True):
                 self._needs_save = True
-            logger.info(f"Progress updated to line: {line_number} for book: {self.current_book_path}")
+                # 合并密集滚动：进度跳变不大且距上次落盘不足 5 秒时跳过日志写入
+                now = time.monotonic()
+                if (abs(line_number - self._last_logged_progress) >= 50
+                        or now - self._last_log_time > 5.0):
+                    self._append_progress_log(self.current_book_path, line_number)
+                    self._last_logged_progress = line_number
+                    self._last_log_time = now
+            logger.debug("Progress updated to line: %s for book: %s", line_number, self.current_book_path)
         else:
-            logger.warning(f"Cannot update progress, current book invalid: {self.current_book_path}")
+            logger.warning("Cannot update progress, current book invalid: %s", self.current_book_path)
 
     def get_total_lines(self) -> int:
         """获取总行数"""
-        logger.debug(f"Getting total lines for book: {self.current_book_path}")
+        logger.debug("Getting total lines for book: %s", self.current_book_path)
         # Validate that the current book path exists in bookshelf and file exists
-        if (self.current_book_path and
-                self.current_book_path in self.bookshelf and
-                os.path.exists(self.current_book_path)):
-            book_info = self.bookshelf[self.current_book_path]
+        if (self.current_book_path == self._validated_path and
+                self.current_book_path in self._books):
+            book_info = self._books[self.current_book_path]
+            # 每次调用只 stat 一次，比较与回写共用同一个结果
+            try:
+                current_size = os.path.getsize(self.current_book_path)
+            except OSError:
+                current_size = None
             if "total_lines" in book_info:
-                total_lines = book_info["total_lines"]
-                logger.debug(f"Returning cached total lines: {total_lines}")
-                return total_lines
-            # Only count lines if not cached
+                # 文件大小没变才信任书架里缓存的行数
+                if book_info.get("size") == current_size:
+                    total_lines = book_info["total_lines"]
+                    logger.debug("Returning cached total lines: %s", total_lines)
+                    return total_lines
+                logger.info("Book size changed, recounting lines for %s", self.current_book_path)
+            # Only count lines if not cached (or the cached value went stale)
             total_lines = self._count_lines(self.current_book_path)
-            logger.info(f"Counted lines for book: {self.current_book_path}, total: {total_lines}")
+            book_info["total_lines"] = total_lines
+            if current_size is not None:
+                book_info["size"] = current_size
+            self._needs_save = True
+            logger.info("Counted lines for book: %s, total: %s", self.current_book_path, total_lines)
             return total_lines
         total_lines = self._count_lines(self.current_book_path) if self.current_book_path else 0
-        logger.info(f"Returning total lines for current book: {total_lines}")
+        logger.info("Returning total lines for current book: %s", total_lines)
         return total_lines
 
     def _count_lines(self, file_path: str) -> int:
         """统计文件行数"""
-        logger.info(f"Counting lines in file: {file_path}")
-        if not os.path.exists(file_path):
-            logger.warning(f"File does not exist for line counting: {file_path}")
+        logger.debug("Counting lines in file: %s", file_path)
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            logger.warning("File does not exist for line counting: %s", file_path)
             return 0
 
+        # 文件未变化时直接复用缓存，避免重复全文件扫描
+        cache_key = (file_path, st.st_mtime_ns, st.st_size)
+        cached = self._line_count_cache.get(cache_key)
+        if cached is not None:
+            logger.debug("Returning cached line count for %s: %s", file_path, cached)
+            return cached
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                line_count = sum(1 for _ in f)
-                logger.info(f"File {file_path} has {line_count} lines")
-                return line_count
-        except (UnicodeDecodeError, PermissionError, OSError) as e:
-            logger.error(f"Error counting lines in {file_path}: {e}")
+            # mmap 后直接对页缓存做换行统计，省掉 read 的用户态缓冲拷贝
+            with open(file_path, 'rb') as f:
+                line_count = 0
+                try:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        # 按 64 MiB 片段统计，避免一次性物化超大 bytes
+                        pos, size = 0, len(mm)
+                        while pos < size:
+                            end = min(pos + (64 << 20), size)
+                            line_count += mm[pos:end].count(b'\n')
+                            pos = end
+                        # 末尾无换行的最后一行也算一行，与按行迭代的语义一致
+                        if size and mm[size - 1] != 0x0A:
+                            line_count += 1
+                except ValueError:
+                    # 空文件无法 mmap，行数为 0
+                    pass
+            self._line_count_cache[cache_key] = line_count
+            logger.info("File %s has %s lines", file_path, line_count)
+            return line_count
+        except (PermissionError, OSError) as e:
+            logger.error("Error counting lines in %s: %s", file_path, e)
             return 0
 
-    def save(self):
-        """保存书架数据到文件"""
+    def save(self, force: bool = False):
+        """保存书架数据到文件（间隔内的重复调用会被合并，force 跳过合并）"""
         if self._needs_save and config.get('auto_save_progress', True):
+            # JSON 快照是整个书架的全量重写，频繁调用时按时间窗口合并
+            now = time.monotonic()
+            if not force and now - self._last_save_ts < self._save_interval:
+                logger.debug("Skipping bookshelf save, last save was %.1fs ago", now - self._last_save_ts)
+                return
             logger.info(f"Saving bookshelf data...")
             try:
                 self.bookshelf.save()
                 self._needs_save = False
+                self._last_save_ts = now
+                self._truncate_progress_log()
                 logger.info("Bookshelf data saved successfully")
             except (PermissionError, OSError) as e:
                 logger.error(f"Error saving bookshelf: {e}")
@@ -146,129 +284,274 @@ class BookManager:
             else:
                 logger.debug("No changes to save, bookshelf data unchanged")
 
+    def flush_now(self):
+        """退出前调用：无视合并窗口，立即落盘"""
+        self.save(force=True)
+
+    def _truncate_progress_log(self):
+        """书架快照写盘成功后清空进度日志"""
+        try:
+            if self._progress_log is not None:
+                self._progress_log.close()
+                self._progress_log = None
+            if self._progress_log_path.exists():
+                self._progress_log_path.write_text("", encoding='utf-8')
+        except OSError as e:
+            logger.error(f"Error truncating progress log: {e}")
+
     def get_book_content(self) -> List[str]:
-        """获取书籍内容（分页后的）"""
-        logger.info(f"Getting content for book: {self.current_book_path}")
+        """获取书籍内容（分页后的），文件未变化时直接命中磁盘缓存"""
+        cached = self._load_pagination_cache()
+        if cached is not None:
+            return cached
+        content = list(self.iter_book_content())
+        self._save_pagination_cache(content)
+        return content
+
+    def _pagination_cache_path(self, file_path: str) -> Path:
+        """分页缓存文件路径，按书籍路径哈希命名"""
+        key = hashlib.blake2b(file_path.encode('utf-8')).hexdigest()[:16]
+        return self.app_data_dir / "cache" / f"{key}.json"
+
+    def _load_pagination_cache(self) -> Optional[List[str]]:
+        """读取分页缓存，(mtime, size, max_length) 任一不符则视为失效"""
         if not self.current_book_path:
-            logger.warning("No current book set, returning empty content")
-            return []
+            return None
+        try:
+            st = os.stat(self.current_book_path)
+        except OSError:
+            return None
 
-        # Check if file exists before attempting to read
-        if not os.path.exists(self.current_book_path):
-            logger.error(f"Current book file does not exist: {self.current_book_path}")
-            return [f"文件不存在: {self.current_book_path}"]
+        cache_path = self._pagination_cache_path(self.current_book_path)
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        except OSError as e:
+            logger.error(f"Error reading pagination cache: {e}")
+            return None
+
+        if data.get("size") != st.st_size or data.get("max_length") != _MAX_LINE_LENGTH:
+            logger.info("Pagination cache is stale for %s", self.current_book_path)
+            return None
+        if data.get("mtime_ns") != st.st_mtime_ns:
+            # mtime 变了但大小没变（复制、touch、网盘同步等）：
+            # 退而比较内容哈希，内容未变仍可命中
+            stored_hash = data.get("content_hash")
+            if not stored_hash or self._content_hash(self.current_book_path) != stored_hash:
+                logger.info("Pagination cache is stale for %s", self.current_book_path)
+                return None
+            logger.info("Book mtime changed but content hash matches, reusing cache")
+
+        lines = data.get("lines")
+        line_mapping = data.get("line_mapping")
+        if not isinstance(lines, list) or not isinstance(line_mapping, list):
+            return None
+        self.line_mapping = array('i', line_mapping)
+        logger.info("Loaded %s display lines from pagination cache", len(lines))
+        return lines
 
-        # Optional: Check file size to prevent loading extremely large files
+    @staticmethod
+    def _content_hash(file_path: str) -> Optional[str]:
+        """整文件内容哈希，用于 mtime 不可信时的缓存校验"""
         try:
-            file_size = os.path.getsize(self.current_book_path)
-            logger.info(f"Book file size: {file_size} bytes")
-            # Limit to 100MB for safety (adjust as needed)
-            if file_size > 100 * 1024 * 1024:  # 100MB
-                logger.error(f"Book file too large ({file_size} bytes), refusing to load")
-                return ["文件过大，无法加载"]
+            h = hashlib.blake2b()
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+            return h.hexdigest()
+        except OSError:
+            return None
+
+    def _save_pagination_cache(self, content: List[str]):
+        """将分页结果写入磁盘缓存，供下次启动直接加载"""
+        # 行号映射与内容长度不一致说明本次产出是错误提示，不缓存
+        if not self.current_book_path or len(self.line_mapping) != len(content):
+            return
+        try:
+            st = os.stat(self.current_book_path)
+            cache_path = self._pagination_cache_path(self.current_book_path)
+            cache_path.parent.mkdir(exist_ok=True, parents=True)
+            # 先写临时文件再原子替换，写入中途崩溃不会留下残缺缓存
+            tmp_path = cache_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "mtime_ns": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "max_length": _MAX_LINE_LENGTH,
+                    "content_hash": self._content_hash(self.current_book_path),
+                    "lines": content,
+                    "line_mapping": self.line_mapping.tolist(),
+                }, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, cache_path)
+            logger.info("Saved pagination cache for %s", self.current_book_path)
         except OSError as e:
-            logger.error(f"Cannot get file size for {self.current_book_path}: {e}")
-            return [f"无法获取文件大小: {self.current_book_path}"]
+            logger.error(f"Error writing pagination cache: {e}")
+
+    def _iter_raw_lines(self, file_size: int):
+        """按行产出原始文本。
+
+        小文件整块读入一次性解码最快；大文件改用 mmap 在映射上按 \\n 扫描，
+        每行单独解码，避免同时持有整本书的字节和字符串两份大缓冲。
+        """
+        if file_size < 4 * 1024 * 1024:  # 4MB 以下 mmap 的建立开销不划算
+            with open(self.current_book_path, 'rb') as f:
+                data = f.read()
+            # 一次性解码走 CPython 的批量 UTF-8 快速路径；
+            # errors='replace' 避免坏字节中断阅读
+            raw = data.decode('utf-8', errors='replace')
+            del data
+            yield from raw.splitlines()
+            return
+
+        with open(self.current_book_path, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            size = len(mm)
+            find = mm.find
+            while pos < size:
+                nl = find(b'\n', pos)
+                if nl == -1:
+                    nl = size
+                chunk = mm[pos:nl]
+                if chunk.endswith(b'\r'):
+                    chunk = chunk[:-1]
+                yield chunk.decode('utf-8', errors='replace')
+                pos = nl + 1
+
+    def iter_book_content(self):
+        """流式生成分页后的显示行，行号映射随消费进度增量构建"""
+        logger.info("Getting content for book: %s", self.current_book_path)
+        if not self.current_book_path:
+            logger.warning("No current book set, returning empty content")
+            return
 
+        # 单次 stat 同时拿到存在性和文件大小
         try:
-            with open(self.current_book_path, 'r', encoding='utf-8') as f:
-                original_lines = f.readlines()
-                logger.info(f"Loaded {len(original_lines)} lines from book file")
+            file_size = os.stat(self.current_book_path).st_size
+        except FileNotFoundError:
+            logger.error(f"Current book file does not exist: {self.current_book_path}")
+            yield f"文件不存在: {self.current_book_path}"
+            return
+        except OSError as e:
+            logger.error(f"Cannot get file size for {self.current_book_path}: {e}")
+            yield f"无法获取文件大小: {self.current_book_path}"
+            return
 
+        logger.debug("Book file size: %s bytes", file_size)
+        # Limit to 100MB for safety (adjust as needed)
+        if file_size > 100 * 1024 * 1024:  # 100MB
+            logger.error(f"Book file too large ({file_size} bytes), refusing to load")
+            yield "文件过大，无法加载"
+            return
+
+        try:
             # 处理每行内容，进行分页
-            formatted_lines = []
             display_line_index = 0  # Track display line index
+            self.line_mapping = line_mapping = array('i')
+            split_line_fn = self._split_line  # 循环内省去每行一次属性查找
             logger.info("Processing book content for display formatting")
 
-            for idx, original_line in enumerate(original_lines):
+            for idx, original_line in enumerate(self._iter_raw_lines(file_size)):
                 actual_line_number = idx + 1  # 实际文件行号从1开始
                 line = original_line.strip()
-                if not line:  # 跳过空行
+                if not line:  # 跳过空行（strip 后判空，省掉单独的 isspace 扫描）
                     continue
 
                 # 分割长行后，将分割出的每行都映射到原始行号
-                split_lines = self._split_line(line)
+                split_lines = split_line_fn(line)
                 for split_line in split_lines:
-                    formatted_lines.append(split_line)
-                    self.line_mapping[display_line_index] = actual_line_number
-                    if actual_line_number not in self.reverse_line_mapping:
-                        self.reverse_line_mapping[actual_line_number] = []
-                    self.reverse_line_mapping[actual_line_number].append(display_line_index)
+                    line_mapping.append(actual_line_number)
                     display_line_index += 1
+                    # 短行驻留：章节标题、分隔线等重复出现时全书共享一个对象；
+                    # 限制长度避免把大量唯一长段落钉在驻留表里
+                    yield sys.intern(split_line) if len(split_line) < 64 else split_line
 
-            logger.info(f"Formatted book content into {len(formatted_lines)} display lines")
-            return formatted_lines
+            logger.info("Formatted book content into %s display lines", display_line_index)
         except Exception as e:
             logger.error(f"Error reading book content: {str(e)}")
-            return [f"读取文件错误: {str(e)}"]
+            yield f"读取文件错误: {str(e)}"
 
     def get_actual_line_number(self, display_line_index: int) -> int:
         """根据显示行索引获取实际行号"""
-        return self.line_mapping.get(display_line_index, -1)  # 如果没有映射，返回-1
+        if 0 <= display_line_index < len(self.line_mapping):
+            return self.line_mapping[display_line_index]
+        return -1  # 如果没有映射，返回-1
 
     def get_display_line_index(self, actual_line_number: int) -> int:
         """根据实际行号获取显示行索引"""
-        while actual_line_number >= 0:
-            indices = self.reverse_line_mapping.get(actual_line_number, [])
-            if indices:
-                break
-            else:
-                actual_line_number -= 1
-        else:
-            indices = None
-        return indices[0] if indices else -1
-
-    def _split_line(self, line: str, max_length: int = 66) -> List[str]:
+        actual_lines = self.line_mapping
+        if not actual_lines or actual_line_number < actual_lines[0]:
+            return -1
+        idx = bisect.bisect_left(actual_lines, actual_line_number)
+        if idx < len(actual_lines) and actual_lines[idx] == actual_line_number:
+            return idx
+        # 目标行未被显示（空行等），回退到前一个有内容的行的第一个显示行
+        return bisect.bisect_left(actual_lines, actual_lines[idx - 1])
+
+    def _split_line(self, line: str, max_length: int = _MAX_LINE_LENGTH) -> List[str]:
         """将长行分割为适合显示的段落"""
         if not line.strip():
             return []
-
-        # 提取句子并组织成段落
-        sentences = self._extract_sentences(line)
-        if not sentences:
-            return []
-
-        lines = self._organize_into_lines(sentences, max_length // 2)
-        return self._pair_lines(lines)
-
-    def _extract_sentences(self, text: str) -> List[str]:
+        max_len = max_length // 2
+        # 整行不超过单行宽度时，组行/配对必然原样返回，跳过正则与扫描
+        if len(line) <= max_len:
+            return [line]
+        # 无中文终止标点（英文等内容）：整行就是一个超长"句子"，
+        # 句子正则必然空扫，直接走强制分割 + 两行配对
+        if '。' not in line and '？' not in line and '！' not in line:
+            pieces = self._smart_split(line, max_len)
+            return ['\n'.join(pieces[i:i + 2]) for i in range(0, len(pieces), 2)]
+        return list(self._iter_paragraphs(line, max_len))
+
+    def _iter_sentences(self, text: str):
         """提取句子，支持标点符号后的引号"""
-        # 匹配句子：内容 + 标点(。？！) + 可选引号("")
-        pattern = r'[^。？！]+[。？！]["”]?'
-        sentences = re.findall(pattern, text)
-
-        # 处理末尾没有标点的文本
-        if sentences:
-            matched_length = sum(len(s) for s in sentences)
-            if matched_length < len(text):
-                remaining = text[matched_length:].strip()
-                if remaining:
-                    sentences.append(remaining)
-        else:
-            # 没有找到标点，返回整个文本
-            sentences = [text] if text.strip() else []
-
-        return sentences
-
-    def _organize_into_lines(self, sentences: List[str], max_len: int) -> List[str]:
-        """将句子组织成行，每行不超过max_len"""
-        lines = []
+        last_end = 0
+        for m in _sentence_finditer(text):
+            yield m.group(0)
+            last_end = m.end()
+
+        # 处理末尾没有标点的文本（没有任何标点时即整个文本）
+        if last_end < len(text):
+            remaining = text[last_end:].strip()
+            if remaining:
+                yield remaining
+
+    def _iter_paragraphs(self, line: str, max_len: int):
+        """单遍扫描：句子组行、两行配对成段，不生成中间列表"""
+        pending = None  # 已完成的上一行，等待与下一行配对
         current = []
         current_len = 0
 
-        for sentence in sentences:
+        for sentence in self._iter_sentences(line):
             sen_len = len(sentence)
 
             # 单句超长：强制分割
             if sen_len > max_len:
                 if current:
-                    lines.append(''.join(current))
+                    done = current[0] if len(current) == 1 else ''.join(current)
+                    if pending is None:
+                        pending = done
+                    else:
+                        yield f"{pending}\n{done}"
+                        pending = None
                     current, current_len = [], 0
-                lines.extend(self._smart_split(sentence, max_len))
+                for piece in self._smart_split(sentence, max_len):
+                    if pending is None:
+                        pending = piece
+                    else:
+                        yield f"{pending}\n{piece}"
+                        pending = None
             # 加入当前行会超长：开始新行
             elif current_len + sen_len > max_len:
                 if current:
-                    lines.append(''.join(current))
+                    done = current[0] if len(current) == 1 else ''.join(current)
+                    if pending is None:
+                        pending = done
+                    else:
+                        yield f"{pending}\n{done}"
+                        pending = None
                 current, current_len = [sentence], sen_len
             # 正常加入当前行
             else:
@@ -276,9 +559,14 @@ class BookManager:
                 current_len += sen_len
 
         if current:
-            lines.append(''.join(current))
-
-        return lines
+            done = current[0] if len(current) == 1 else ''.join(current)
+            if pending is None:
+                pending = done
+            else:
+                yield f"{pending}\n{done}"
+                pending = None
+        if pending is not None:
+            yield pending
 
     def _smart_split(self, text: str, max_len: int) -> List[str]:
         """智能分割超长文本，优先在标点处分割"""
@@ -292,17 +580,19 @@ class BookManager:
             end = min(start + max_len, len(text))
 
             if end < len(text):
-                # 寻找最佳分割点（标点 > 空格）
-                split_pos = end
-                # 在后1/3范围内查找标点
+                # 寻找最佳分割点（标点 > 空格），在后1/3范围内用 rfind 做 C 级扫描
                 search_start = start + max_len * 2 // 3
-
-                for i in range(end - 1, search_start - 1, -1):
-                    if text[i] in '，；：、。？！':
-                        split_pos = i + 1
-                        break
-                    elif text[i] in ' \t' and split_pos == end:
-                        split_pos = i
+                best = -1
+                for ch in _PUNCT_CHARS:
+                    pos = text.rfind(ch, search_start, end)
+                    if pos > best:
+                        best = pos
+                if best >= 0:
+                    split_pos = best + 1
+                else:
+                    space = max(text.rfind(' ', search_start, end),
+                                text.rfind('\t', search_start, end))
+                    split_pos = space if space >= 0 else end
 
                 result.append(text[start:split_pos])
                 start = split_pos
@@ -311,10 +601,3 @@ class BookManager:
                 break
 
         return result
-
-    def _pair_lines(self, lines: List[str]) -> List[str]:
-        """将行两两配对成段，用换行符连接"""
-        return [
-            lines[i] + ('\n' + lines[i + 1] if i + 1 < len(lines) else '')
-            for i in range(0, len(lines), 2)
-        ]
@@ -68,8 +68,11 @@ class ConfigModel(BaseModel):
 
 config_file = app_data_dir / "config.yaml"
 try:
+    # 仅首次运行时写出默认配置；已有配置文件时导入阶段不做任何磁盘写入
+    _config_existed = config_file.exists()
     config = ConfigManager(config_file, validation_model=ConfigModel, auto_reload=False)
-    config.save()
+    if not _config_existed:
+        config.save()
 except ValidationError as e:
     logging.error(f"%s validation error: %s", config_file, e)
     sys.exit(1)
@@ -1,7 +1,7 @@
 import logging
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QEvent, QTimer, QObject, QRunnable, QThreadPool, pyqtSignal
 from PyQt6.QtGui import QKeyEvent, QFont
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QApplication
+from PyQt6.QtWidgets import QWidget, QLabel, QApplication, QFileDialog
 
 from .config import config
 from .theme_manager import get_theme_colors
@@ -9,29 +9,25 @@ from .theme_manager import get_theme_colors
 # Set up module-specific logger
 logger = logging.getLogger(__name__)
 
-def get_focus_in_style():
-    """Generate focus-in style based on configuration and theme"""
+def get_label_style():
+    """Generate the content label style for both focus states based on configuration and theme"""
     colors = get_theme_colors()
+    font_size = config.get('font_size', 10) + 4
+    # 两种焦点状态合并为一张样式表，按动态属性选择；
+    # 焦点切换只翻转属性并 polish，不再重新解析 CSS
     return f"""
-        QLabel {{
+        QLabel[focused="true"] {{
             background-color: {colors['bg_color']};
             border: 2px solid {colors['border_color']};
             color: {colors['text_color']};
-            font-size: {config.get('font_size', 10) + 4}px;
+            font-size: {font_size}px;
         }}
-    """
-
-def get_focus_out_style():
-    """Generate focus-out style based on configuration and theme"""
-    colors = get_theme_colors()
-    return f"""
-        QLabel {{
+        QLabel[focused="false"] {{
             background-color: {colors['blur_bg_color']};
             border: 1px solid #4CAF5022;
             color: {colors['blur_text_color']};
             opacity: {config.get('opacity_when_blurred', 0.1)};
-            font-size: {config.get('font_size', 10) + 4}px;
-            
+            font-size: {font_size}px;
         }}
     """
 
@@ -42,36 +38,93 @@ LINE_NUMBER_STYLE = """
     }
 """
 
+# 数字键集合与按键分发表：每次按键只做一次字典查找
+_NUMERIC_KEYS = frozenset(range(Qt.Key.Key_0, Qt.Key.Key_9 + 1))
+
+
+class _BookLoadSignals(QObject):
+    finished = pyqtSignal(list, int)
+
+
+class BookLoadWorker(QRunnable):
+    """后台加载书籍内容，避免大文件在启动时阻塞 UI"""
+
+    def __init__(self, book_manager):
+        super().__init__()
+        self.book_manager = book_manager
+        self.signals = _BookLoadSignals()
+
+    def run(self):
+        try:
+            content = self.book_manager.get_book_content()
+            progress = self.book_manager.get_current_progress()
+        except Exception as e:
+            logger.error(f"Error loading book in background: {e}")
+            content, progress = [f"读取文件错误: {e}"], 0
+        self.signals.finished.emit(content, progress)
+
 
 class FloatingWindow(QWidget):
     def __init__(self, book_manager):
         super().__init__()
         logger.info("Initializing FloatingWindow")
         self.book_manager = book_manager
-        self.current_line = self.book_manager.get_current_progress()
-        self.book_content = self.book_manager.get_book_content()
-        logger.info(f"Initialized window with {len(self.book_content)} lines of content")
+        self.current_line = 0
+        self.book_content = []
+        # 行号标签文本缓存：同一实际行号只格式化一次
+        self._lineno_str_cache = {}
 
         # Variables for dragging functionality
         self.is_dragging = False
         self.drag_position = None
+        # 高轮询率鼠标下合并移动：每个事件循环周期最多 move 一次
+        self._pending_move = None
         
         # Variable for g key input
         self.waiting_for_line_number = False
-        self.line_number_input = ""
+        # 行号输入按键逐个追加到列表，确认时才 join，省去每键的字符串重建
+        self.line_number_input = []
 
         # Track topmost status
         self.was_topmost_last_check = True
 
-        # Timer to check if window is topmost every 1 second
-        self.topmost_timer = QTimer(self)
-        self.topmost_timer.timeout.connect(self.check_topmost_status)
-        self.topmost_timer.start(500)
+        # 置顶保障改为事件驱动（见 changeEvent）；这里只留一个低频兜底，
+        # 覆盖其他程序抢占置顶而 Qt 收不到事件的情况。
+        # 秒级精度即可，VeryCoarseTimer 让系统合并唤醒
+        self._topmost_net_timer = QTimer(self)
+        self._topmost_net_timer.setTimerType(Qt.TimerType.VeryCoarseTimer)
+        self._topmost_net_timer.timeout.connect(self._topmost_safety_net)
+        self._topmost_net_timer.start(5000)
+
+        # 合并连发的导航按键：16ms 内的多次行移动只刷新一次显示
+        self._nav_flush_timer = QTimer(self)
+        self._nav_flush_timer.setSingleShot(True)
+        self._nav_flush_timer.setInterval(16)
+        self._nav_flush_timer.timeout.connect(self.update_display)
+
+        # 周期性落盘书架快照；间隔内无变化时 save() 直接返回
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setTimerType(Qt.TimerType.VeryCoarseTimer)
+        self.autosave_timer.timeout.connect(self.book_manager.save)
+        self.autosave_timer.start(30000)
 
         self.init_ui()
-        self.update_display()
+
+        # 内容在后台线程加载，窗口先显示占位文本
+        self.content_label.setText("加载中…")
+        self.line_number_label.setText("")
+        worker = BookLoadWorker(self.book_manager)
+        worker.signals.finished.connect(self._on_content_loaded)
+        QThreadPool.globalInstance().start(worker)
         logger.info("FloatingWindow initialized successfully")
 
+    def _on_content_loaded(self, content, progress):
+        """后台加载完成后填充内容"""
+        logger.info(f"Book content loaded with {len(content)} display lines")
+        self.book_content = content
+        self.current_line = progress
+        self.update_display()
+
     def init_ui(self):
         """初始化UI"""
         # Set window size from config
@@ -88,12 +141,12 @@ class FloatingWindow(QWidget):
         # 设置半透明背景
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
 
-        layout = QVBoxLayout()
-
-        # 创建显示标签
-        self.content_label = QLabel()
+        # 创建显示标签；窗口是固定尺寸，直接定位即可，
+        # 省掉 QVBoxLayout 在每次 setText/resize 时的布局计算
+        self.content_label = QLabel(self)
         self.content_label.setAlignment(Qt.AlignmentFlag.AlignLeft)  # 左对齐
-        self.content_label.setStyleSheet(get_focus_in_style())
+        self.content_label.setProperty("focused", True)
+        self.content_label.setStyleSheet(get_label_style())
         self.content_label.setWordWrap(True)
 
         # 设置字体 from config
@@ -102,14 +155,18 @@ class FloatingWindow(QWidget):
         font = QFont(font_family, font_size)
         self.content_label.setFont(font)
 
-        layout.addWidget(self.content_label)
-        self.setLayout(layout)
+        # 与原 QVBoxLayout 的默认边距保持一致
+        margin = 9
+        self.content_label.setGeometry(margin, margin, width - 2 * margin, height - 2 * margin)
 
         # 创建行号标签
         self.line_number_label = QLabel()
         self.line_number_label.setStyleSheet(LINE_NUMBER_STYLE)
         self.line_number_label.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
         self.line_number_label.setParent(self)
+        # 对齐与透明度不随窗口尺寸变化，只设置一次
+        self.line_number_label.setAlignment(Qt.AlignmentFlag.AlignRight)  # 右对齐
+        self.line_number_label.setWindowOpacity(0.5)  # 50%透明度
         self.update_line_number_position()  # 设置初始位置
         
         # 设置窗口属性
@@ -122,191 +179,166 @@ class FloatingWindow(QWidget):
 
     def update_line_number_position(self):
         """更新行号标签位置到右下角"""
-        # 获取窗口大小
-        window_width = self.width()
-        window_height = self.height()
-        
         # 设置行号标签大小和位置 (距离右边和底部10像素)
         label_width = 100  # 估算标签宽度
         label_height = 20  # 估算标签高度
-        x = window_width - label_width - 15
-        y = window_height - label_height - 10
-        
+        x = self.width() - label_width - 15
+        y = self.height() - label_height - 10
         self.line_number_label.setGeometry(x, y, label_width, label_height)
-        self.line_number_label.setAlignment(Qt.AlignmentFlag.AlignRight)  # 右对齐
-        
-        # 设置50%透明度
-        self.line_number_label.setWindowOpacity(0.5)
 
     def update_display(self):
         """更新显示内容"""
-        logger.debug(f"Updating display for line {self.current_line}")
+        logger.debug("Updating display for line %s", self.current_line)
         if not self.book_content:
             logger.warning("No book content to display")
             self.content_label.setText("没有可显示的内容")
             self.line_number_label.setText("")
             return
 
-        if 0 <= self.current_line < len(self.book_content):
-            # 获取实际行号
-            actual_line_number = self.book_manager.get_actual_line_number(self.current_line)
-            line_content = self.book_content[self.current_line]
-            logger.debug(f"Displaying line {self.current_line} (actual: {actual_line_number}): {line_content[:50]}...")
-            
-            # 显示内容（不包含行号）
-            self.content_label.setText(line_content)
-            
-            # 显示行号在单独的标签中
-            if actual_line_number != -1:
-                self.line_number_label.setText(f"L {actual_line_number}")
-            else:
-                self.line_number_label.setText("")
-                
-            self.book_manager.update_progress(self.current_line)
-        elif self.book_content:
-            # 超出范围时重置到开头或末尾
-            old_line = self.current_line
-            self.current_line = max(0, min(self.current_line, len(self.book_content) - 1))
-            actual_line_number = self.book_manager.get_actual_line_number(self.current_line)
-            line_content = self.book_content[self.current_line]
+        # 先夹取到合法范围，范围内与越界两种情况共用同一条显示路径
+        old_line = self.current_line
+        self.current_line = max(0, min(self.current_line, len(self.book_content) - 1))
+        if self.current_line != old_line:
             logger.info(f"Line index out of range ({old_line}), adjusted to {self.current_line}")
-            
-            # 显示内容（不包含行号）
+
+        # 获取实际行号
+        actual_line_number = self.book_manager.get_actual_line_number(self.current_line)
+        line_content = self.book_content[self.current_line]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Displaying line %s (actual: %s): %s...", self.current_line, actual_line_number, line_content[:50])
+
+        # 显示内容（不包含行号）；未变化时跳过 setText，避免无谓的重新排版
+        if self.content_label.text() != line_content:
             self.content_label.setText(line_content)
-            
-            # 显示行号在单独的标签中
-            if actual_line_number != -1:
-                self.line_number_label.setText(f"L {actual_line_number}")
-            else:
-                self.line_number_label.setText("")
-                
-            self.book_manager.update_progress(self.current_line)
+
+        # 显示行号在单独的标签中
+        cache = self._lineno_str_cache
+        line_number_text = cache.get(actual_line_number)
+        if line_number_text is None:
+            line_number_text = f"L {actual_line_number}" if actual_line_number != -1 else ""
+            cache[actual_line_number] = line_number_text
+        if self.line_number_label.text() != line_number_text:
+            self.line_number_label.setText(line_number_text)
+
+        self.book_manager.update_progress(self.current_line)
+
+    def _show_message(self, text: str):
+        """显示一次性提示文本，不触发进度写入"""
+        self.content_label.setText(text)
+        self.line_number_label.setText("")
 
     def jump_to_line(self):
         """跳转到指定行"""
-        if self.waiting_for_line_number and self.line_number_input:
+        pending_input = ''.join(self.line_number_input) if self.waiting_for_line_number else ""
+        self.waiting_for_line_number = False
+        self.line_number_input.clear()
+
+        if pending_input:
             try:
-                target_line = int(self.line_number_input)
-                # Convert actual line number to display index
-                display_index = self.book_manager.get_display_line_index(target_line)
-                
-                if display_index != -1:
-                    self.current_line = display_index
-                    self.update_display()
-                else:
-                    self.content_label.setText(f"未找到第 {target_line} 行")
-                    self.line_number_label.setText("")
-                    
+                target_line = int(pending_input)
             except ValueError:
-                self.content_label.setText("请输入有效的行号")
-                self.line_number_label.setText("")
-            
-            # Reset after jump attempt
-            self.waiting_for_line_number = False
-            self.line_number_input = ""
-            self.update_display()  # Restore normal display
-        else:
-            self.waiting_for_line_number = False
-            self.line_number_input = ""
-            self.update_display()
+                self._show_message("请输入有效的行号")
+                return
+            # Convert actual line number to display index
+            display_index = self.book_manager.get_display_line_index(target_line)
+            if display_index == -1:
+                self._show_message(f"未找到第 {target_line} 行")
+                return
+            self.current_line = display_index
+        # 状态全部落定后统一刷新一次
+        self.update_display()
 
     def keyPressEvent(self, event: QKeyEvent):
         """按键事件处理"""
         key = event.key()
-        logger.debug(f"Key pressed: {event.key()}")
+        logger.debug("Key pressed: %s", key)
         
         # Handle numeric input when waiting for line number
         if self.waiting_for_line_number:
-            if Qt.Key.Key_0 <= event.key() <= Qt.Key.Key_9:
-                self.line_number_input += event.text()
-                logger.debug(f"Line number input: {self.line_number_input}")
+            if key in _NUMERIC_KEYS:
+                self.line_number_input.append(event.text())
+                entered = ''.join(self.line_number_input)
+                logger.debug("Line number input: %s", entered)
                 # Update display to show current input
-                self.content_label.setText(f"输入行号: {self.line_number_input}")
+                self.content_label.setText(f"输入行号: {entered}")
                 self.line_number_label.setText("")
-            elif event.key() == Qt.Key.Key_Return:  # Enter key to confirm
-                logger.info(f"Confirming line number input: {self.line_number_input}")
+            elif key == Qt.Key.Key_Return:  # Enter key to confirm
+                logger.info("Confirming line number input: %s", ''.join(self.line_number_input))
                 self.jump_to_line()
-            elif event.key() == Qt.Key.Key_Escape:  # Escape to cancel
+            elif key == Qt.Key.Key_Escape:  # Escape to cancel
                 logger.info("Cancelling line number input")
                 self.waiting_for_line_number = False
-                self.line_number_input = ""
+                self.line_number_input.clear()
                 self.update_display()
             else:
                 super().keyPressEvent(event)
             return
 
-        if key == Qt.Key.Key_G:
-            logger.info("G key pressed - entering line number mode")
-            # Start waiting for line number input
-            self.waiting_for_line_number = True
-            self.line_number_input = ""
-            self.content_label.setText("输入行号：（然后按回车)")
-            self.line_number_label.setText("")
-        elif key == Qt.Key.Key_R:
-            logger.info("R key pressed - reselecting book")
-            # Re-ask for the book to read
-            self.reselect_book()
-        elif key in (Qt.Key.Key_Up, Qt.Key.Key_W):
-            logger.debug("Moving to previous line (Up/W key)")
-            self.previous_line()
-        elif key in (Qt.Key.Key_Down, Qt.Key.Key_S):
-            logger.debug("Moving to next line (Down/S key)")
-            self.next_line()
-        elif key == Qt.Key.Key_Q:
-            logger.info("Q key pressed - quitting application")
-            QApplication.quit()
+        handler = _KEY_HANDLERS.get(key)
+        if handler is not None:
+            handler(self)
         else:
-            logger.debug(f"Unhandled key: {event.key()}")
+            logger.debug("Unhandled key: %s", key)
             super().keyPressEvent(event)
 
+    def _enter_line_number_mode(self):
+        """进入行号输入模式"""
+        logger.info("G key pressed - entering line number mode")
+        self.waiting_for_line_number = True
+        self.line_number_input.clear()
+        self.content_label.setText("输入行号：（然后按回车)")
+        self.line_number_label.setText("")
+
+    @staticmethod
+    def _quit_application(_self):
+        logger.info("Q key pressed - quitting application")
+        QApplication.quit()
+
     def previous_line(self):
         """显示上一行内容"""
-        logger.debug(f"Moving to previous line from current line {self.current_line}")
+        logger.debug("Moving to previous line from current line %s", self.current_line)
         if not self.book_content:
             logger.warning("No book content to navigate")
             return
 
-        new_line = self.current_line - 1
-        skipped_lines = 0
-        while new_line >= 0 and not self.book_content[new_line].strip():
-            new_line -= 1
-            skipped_lines += 1
-
-        if new_line >= 0:
-            self.current_line = new_line
-            logger.debug(f"Moved to previous line: {new_line} (skipped {skipped_lines} empty lines)")
-            self.update_display()
+        # 分页阶段已过滤空行，内容里没有可跳过的空白行，直接退一行
+        if self.current_line > 0:
+            self.current_line -= 1
+            logger.debug("Moved to previous line: %s", self.current_line)
+            self._schedule_display_update()
         else:
             logger.info("Already at the beginning of the book")
 
     def next_line(self):
         """显示下一行内容"""
-        logger.debug(f"Moving to next line from current line {self.current_line}")
+        logger.debug("Moving to next line from current line %s", self.current_line)
         if not self.book_content:
             logger.warning("No book content to navigate")
             return
 
-        new_line = self.current_line + 1
-        skipped_lines = 0
-        while new_line < len(self.book_content) and not self.book_content[new_line].strip():
-            new_line += 1
-            skipped_lines += 1
-
-        if new_line < len(self.book_content):
-            self.current_line = new_line
-            logger.debug(f"Moved to next line: {new_line} (skipped {skipped_lines} empty lines)")
-            self.update_display()
+        # 同上：内容里不存在空行，步进即可
+        if self.current_line + 1 < len(self.book_content):
+            self.current_line += 1
+            logger.debug("Moved to next line: %s", self.current_line)
+            self._schedule_display_update()
         else:
             logger.info("Reached the end of the book")
 
+    def _schedule_display_update(self):
+        """按住方向键连发时合并刷新，最多每 16ms 重排版一次"""
+        if not self._nav_flush_timer.isActive():
+            self._nav_flush_timer.start()
+
     def mousePressEvent(self, event):
         """鼠标点击事件 - 设置焦点和开始拖拽"""
-        logger.debug(f"Mouse press event at {event.position()}, button: {event.button()}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Mouse press event at %s, button: %s", event.position(), event.button())
         if event.button() == Qt.MouseButton.LeftButton:
             self.is_dragging = True
             # Calculate the position relative to the window
-            self.drag_position = event.globalPosition().toPoint() - self.frameGeometry().topLeft()
-            logger.debug(f"Starting drag with position: {self.drag_position}")
+            # 无边框窗口下本地坐标即拖拽偏移，免去 frameGeometry 的窗口系统往返
+            self.drag_position = event.position().toPoint()
+            logger.debug("Starting drag with position: %s", self.drag_position)
             event.accept()
         else:
             self.setFocus()
@@ -314,12 +346,20 @@ class FloatingWindow(QWidget):
     def mouseMoveEvent(self, event):
         """鼠标移动事件 - 实现窗口拖拽"""
         if self.is_dragging and event.buttons() == Qt.MouseButton.LeftButton:
-            # Move the window to the new position
             new_pos = event.globalPosition().toPoint() - self.drag_position
-            logger.debug(f"Dragging window to position: {new_pos}")
-            self.move(new_pos)
+            logger.debug("Dragging window to position: %s", new_pos)
+            # 只记录目标位置，由事件循环末尾统一 move，合并同一周期内的连发移动
+            if self._pending_move is None:
+                QTimer.singleShot(0, self._flush_move)
+            self._pending_move = new_pos
         event.accept()
 
+    def _flush_move(self):
+        """应用本周期内最后一次拖拽位置"""
+        if self._pending_move is not None:
+            self.move(self._pending_move)
+            self._pending_move = None
+
     def mouseReleaseEvent(self, event):
         """鼠标释放事件 - 结束拖拽"""
         if event.button() == Qt.MouseButton.LeftButton:
@@ -335,20 +375,28 @@ class FloatingWindow(QWidget):
 
     def update_theme(self):
         """Update the theme of the window based on current configuration"""
-        if self.hasFocus():
-            self.content_label.setStyleSheet(get_focus_in_style())
-        else:
-            self.content_label.setStyleSheet(get_focus_out_style())
+        # 主题变化才重建并重新解析样式表；焦点状态由 focused 属性选择
+        self.content_label.setStyleSheet(get_label_style())
 
     def focusInEvent(self, event):
         """获得焦点时的事件"""
         logger.debug("Window gained focus")
-        self.content_label.setStyleSheet(get_focus_in_style())
+        self._apply_focus_style(True)
 
     def focusOutEvent(self, event):
         """失去焦点时的事件"""
         logger.debug("Window lost focus")
-        self.content_label.setStyleSheet(get_focus_out_style())
+        self._apply_focus_style(False)
+
+    def _apply_focus_style(self, focused: bool):
+        """翻转 focused 属性并 polish，套用对应焦点样式"""
+        label = self.content_label
+        if label.property("focused") == focused:
+            return
+        label.setProperty("focused", focused)
+        style = label.style()
+        style.unpolish(label)
+        style.polish(label)
 
     def resizeEvent(self, event):
         """窗口大小改变时更新行号位置"""
@@ -363,11 +411,14 @@ class FloatingWindow(QWidget):
         """重新选择要阅读的书籍"""
         logger.info("Re-selecting book initiated by user")
         try:
-            from PyQt6.QtWidgets import QFileDialog
             file_path, _ = QFileDialog.getOpenFileName(
                 self, "选择文本文件", "", "Text Files (*.txt)"
             )
             if file_path:
+                # 选中的就是当前书：跳过整个重载流程，维持现有显示
+                if file_path == self.book_manager.current_book_path:
+                    logger.info("Same book reselected, keeping current content")
+                    return
                 logger.info(f"User selected new book: {file_path}")
                 # Add the new book to bookshelf and set it as current
                 self.book_manager.add_book(file_path)
@@ -386,22 +437,29 @@ class FloatingWindow(QWidget):
             # Ensure the display updates properly even if there's an error
             self.update_display()
 
-    def check_topmost_status(self):
-        """检查窗口是否为顶层窗口"""
-        # Check if the window is still on top by checking if it's active and visible
-        is_currently_topmost = self.isActiveWindow() and self.isVisible()
-        
-        # Optional: Log or handle changes in topmost status
-        if is_currently_topmost != self.was_topmost_last_check:
-            # Status changed
-            if is_currently_topmost:
-                # Window became topmost
-                pass  # Could add logic here if needed
-            else:
-                # Window is no longer topmost
-                pass  # Could add logic here if needed
-        
-        self.was_topmost_last_check = is_currently_topmost
-        
-        # Ensure the window stays on top by calling raise_()
-        self.raise_()  # Bring to top without taking focus
+    def changeEvent(self, event):
+        """激活状态变化时维持置顶，替代定时轮询"""
+        if event.type() in (QEvent.Type.ActivationChange, QEvent.Type.WindowStateChange):
+            is_currently_topmost = self.isActiveWindow() and self.isVisible()
+            # 仅在失去顶层状态的瞬间拉回，避免每次事件都 raise_
+            if not is_currently_topmost and self.was_topmost_last_check:
+                self.raise_()  # Bring to top without taking focus
+            self.was_topmost_last_check = is_currently_topmost
+        super().changeEvent(event)
+
+    def _topmost_safety_net(self):
+        """低频兜底：每 5 秒确认一次置顶，处理收不到事件的抢占"""
+        if self.isVisible():
+            self.raise_()
+
+
+# 按键 -> 处理函数；在类定义后绑定，避免前向引用
+_KEY_HANDLERS = {
+    Qt.Key.Key_G: FloatingWindow._enter_line_number_mode,
+    Qt.Key.Key_R: FloatingWindow.reselect_book,
+    Qt.Key.Key_Up: FloatingWindow.previous_line,
+    Qt.Key.Key_W: FloatingWindow.previous_line,
+    Qt.Key.Key_Down: FloatingWindow.next_line,
+    Qt.Key.Key_S: FloatingWindow.next_line,
+    Qt.Key.Key_Q: FloatingWindow._quit_application,
+}
@@ -1,17 +1,31 @@
+import functools
 import logging
 import platform
-from typing import Dict, Any
+import types
+from typing import Any, Mapping
 
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QSettings
-from PyQt6.QtGui import QColor
+from PyQt6.QtCore import QAbstractNativeEventFilter, QFileSystemWatcher, QObject, Qt, QTimer, pyqtSignal
 
 logger = logging.getLogger(__name__)
 
+# KDE 常见深色配色方案的精确名单；名字不含 "dark" 字样的也能认出来
+_KDE_DARK_SCHEMES = frozenset({
+    'BreezeDark',
+    'ArcDark',
+    'ObsidianCoast',
+    'KritaDarkOrange',
+    'Zion(Reversed)',
+})
+
+@functools.lru_cache(maxsize=1)
 def get_system_theme() -> str:
     """
     Detect the system theme based on the operating system.
     Returns 'dark' or 'light'.
+
+    检测要走注册表/子进程/INI 解析，结果进程内缓存；
+    系统主题中途切换时调用 invalidate_theme_cache() 重新检测。
     """
     try:
         system = platform.system()
@@ -20,11 +34,10 @@ def get_system_theme() -> str:
             # Check Windows registry for dark mode setting
             import winreg
             try:
-                registry = winreg.ConnectRegistry(None, winreg.HKEY_CURRENT_USER)
-                key = winreg.OpenKey(registry, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Themes\Personalize")
-                value, _ = winreg.QueryValueEx(key, "AppsUseLightTheme")
-                winreg.CloseKey(key)
-                winreg.CloseKey(registry)
+                # HKEY_CURRENT_USER 常量可直接传给 OpenKey，无需 ConnectRegistry 往返
+                with winreg.OpenKey(winreg.HKEY_CURRENT_USER,
+                                    r"SOFTWARE\Microsoft\Windows\CurrentVersion\Themes\Personalize") as key:
+                    value, _ = winreg.QueryValueEx(key, "AppsUseLightTheme")
                 # If value is 0, dark mode is enabled; if 1, light mode is enabled
                 return 'dark' if value == 0 else 'light'
             except (OSError, ValueError):
@@ -33,11 +46,16 @@ def get_system_theme() -> str:
                 return 'light'
         
         elif system == "Darwin":  # macOS
-            # Check using defaults command
-            from subprocess import run, PIPE
-            result = run(['defaults', 'read', '-g', 'AppleInterfaceStyle'], 
-                        stdout=PIPE, stderr=PIPE, text=True)
-            return 'dark' if result.returncode == 0 else 'light'
+            # 直接读全局偏好 plist，省掉 defaults 子进程的 fork+exec
+            import plistlib
+            from pathlib import Path
+            plist_path = Path('~/Library/Preferences/.GlobalPreferences.plist').expanduser()
+            try:
+                prefs = plistlib.loads(plist_path.read_bytes())
+            except (OSError, plistlib.InvalidFileException):
+                # 键不存在即浅色模式；读不到文件同样按浅色处理
+                return 'light'
+            return 'dark' if prefs.get('AppleInterfaceStyle') == 'Dark' else 'light'
         
         else:  # Linux and others
             # Try to check environment variables commonly used for theming
@@ -48,9 +66,13 @@ def get_system_theme() -> str:
             
             # Check if KDE has dark theme configured
             try:
+                # QSettings 只有 KDE 探测这一处用到，按需加载
+                from PyQt6.QtCore import QSettings
                 kde_config = QSettings(os.path.expanduser('~/.config/kdeglobals'), QSettings.Format.IniFormat)
                 color_scheme = kde_config.value('General/ColorScheme', '')
-                if 'dark' in color_scheme.lower() or 'breeze' in color_scheme.lower():
+                # 先查精确名单，再做一次小写子串扫描兜底；
+                # 原来的 'breeze' 子串匹配会把浅色 Breeze 也误判成深色
+                if color_scheme in _KDE_DARK_SCHEMES or 'dark' in color_scheme.lower():
                     return 'dark'
             except:
                 pass
@@ -62,6 +84,10 @@ def get_system_theme() -> str:
         logger.error(f"Error detecting system theme: {e}")
         return 'light'
 
+def invalidate_theme_cache():
+    """清除系统主题检测缓存，下一次查询重新走系统接口"""
+    get_system_theme.cache_clear()
+
 def get_current_theme() -> str:
     """
     Get the current theme based on the configuration and system settings.
@@ -75,77 +101,201 @@ def get_current_theme() -> str:
     else:
         return config_theme
 
-def get_theme_colors(theme: str = None) -> Dict[str, Any]:
-    """
-    Get the color settings for the specified theme or the current theme.
-    """
+# 主题未配置时的内置默认配色，同时兼作取色的兜底值
+_DEFAULT_DARK_THEME = {
+    'name': 'dark',
+    'bg': 'rgba(30, 30, 30, 240)',
+    'border': '#555',
+    'text': '#ddd',
+    'blur_bg': 'rgba(30, 30, 30, 26)',
+    'blur_text': '#dddddd22'
+}
+_DEFAULT_LIGHT_THEME = {
+    'name': 'light',
+    'bg': 'rgba(255, 255, 255, 240)',
+    'border': '#2196F3',
+    'text': '#333',
+    'blur_bg': 'rgba(255, 255, 255, 26)',
+    'blur_text': '#33333322'
+}
+
+# 主题名 -> 配置条目的索引，首次使用时从配置构建
+_theme_index: dict = {}
+
+def invalidate_theme_index():
+    """配置中的主题列表变化后调用，下次查询重建索引和取色缓存"""
+    _theme_index.clear()
+    _build_theme_colors.cache_clear()
+
+@functools.lru_cache(maxsize=16)
+def _build_theme_colors(theme: str) -> Mapping[str, Any]:
+    """按主题名构建取色结果并缓存；返回只读映射，调用方可放心共享"""
     from .config import config  # Import here to avoid circular import
-    if theme is None:
-        theme = get_current_theme()
-    
-    # Find the theme in the themes list
-    themes = config['themes']
-    target_theme = None
-    
-    for t in themes:
-        if t["name"] == theme:
-            target_theme = t
-            break
+    # Find the theme in the themes index
+    if not _theme_index:
+        _theme_index.update({t["name"]: t for t in config['themes']})
+    target_theme = _theme_index.get(theme)
     
     # If the theme was not found, use defaults based on theme name
     if target_theme is None:
-        if theme == 'dark':
-            target_theme = {
-                'name': 'dark',
-                'bg': 'rgba(30, 30, 30, 240)',
-                'border': '#555',
-                'text': '#ddd',
-                'blur_bg': 'rgba(30, 30, 30, 26)',
-                'blur_text': '#dddddd22'
-            }
-        else:  # default to light
-            target_theme = {
-                'name': 'light',
-                'bg': 'rgba(255, 255, 255, 240)',
-                'border': '#2196F3',
-                'text': '#333',
-                'blur_bg': 'rgba(255, 255, 255, 26)',
-                'blur_text': '#33333322'
-            }
+        target_theme = _DEFAULT_DARK_THEME if theme == 'dark' else _DEFAULT_LIGHT_THEME
     
     # Return the color settings for the found or default theme
-    return {
-        'bg_color': getattr(target_theme, 'bg', target_theme.get('bg', 'rgba(255, 255, 255, 240)')),
-        'border_color': getattr(target_theme, 'border', target_theme.get('border', '#2196F3')),
-        'text_color': getattr(target_theme, 'text', target_theme.get('text', '#333')),
-        'blur_bg_color': getattr(target_theme, 'blur_bg', target_theme.get('blur_bg', 'rgba(255, 255, 255, 26)')),
-        'blur_text_color': getattr(target_theme, 'blur_text', target_theme.get('blur_text', '#33333322')),
-    }
+    # （条目永远是 dict，此前的 getattr 只会失败后落到 .get，纯属浪费）
+    defaults = _DEFAULT_LIGHT_THEME
+    return types.MappingProxyType({
+        'bg_color': target_theme.get('bg', defaults['bg']),
+        'border_color': target_theme.get('border', defaults['border']),
+        'text_color': target_theme.get('text', defaults['text']),
+        'blur_bg_color': target_theme.get('blur_bg', defaults['blur_bg']),
+        'blur_text_color': target_theme.get('blur_text', defaults['blur_text']),
+    })
+
+def get_theme_colors(theme: str = None) -> Mapping[str, Any]:
+    """
+    Get the color settings for the specified theme or the current theme.
+    """
+    from .config import config  # Import here to avoid circular import
+    # 主题名和主题列表从同一份 config 一次取齐，不再经 get_current_theme 多绕一轮
+    if theme is None:
+        config_theme = config.get('theme', 'auto')
+        theme = get_system_theme() if config_theme == 'auto' else config_theme
+    return _build_theme_colors(theme)
+
+# 深色调色板的 (颜色角色名, RGB) 表；QColor/QPalette 延迟导入，
+# 颜色对象在首次构建调色板时才实例化，且整个进程只构建一次
+_DARK_ROLE_RGB = (
+    ('Window', (53, 53, 53)),
+    ('WindowText', (255, 255, 255)),
+    ('Base', (25, 25, 25)),
+    ('AlternateBase', (53, 53, 53)),
+    ('ToolTipBase', (0, 0, 0)),
+    ('ToolTipText', (255, 255, 255)),
+    ('Text', (230, 230, 230)),
+    ('Button', (53, 53, 53)),
+    ('ButtonText', (255, 255, 255)),
+    ('BrightText', (255, 0, 0)),
+    ('Link', (42, 130, 218)),
+    ('Highlight', (42, 130, 218)),
+    ('HighlightedText', (0, 0, 0)),
+)
+
+# 深色调色板构建一次后复用；记录最近应用的主题避免重复套用
+_dark_palette = None
+_last_applied_theme = None
 
 def apply_theme_to_app(app: QApplication):
     """
     Apply the appropriate theme to the Qt application based on the current configuration.
     """
+    # QtGui 的调色板类型只在这里用，推迟到首次套用主题时再加载
+    from PyQt6.QtGui import QColor, QPalette
+
+    global _dark_palette, _last_applied_theme
     theme = get_current_theme()
+    if theme == _last_applied_theme:
+        return
     
     # Create a simple dark or light palette
     if theme == 'dark':
         app.setStyle("Fusion")  # Use Fusion for consistent dark theme
-        palette = app.palette()
-        palette.setColor(app.palette().ColorRole.Window, QColor(53, 53, 53))
-        palette.setColor(app.palette().ColorRole.WindowText, QColor(255, 255, 255))
-        palette.setColor(app.palette().ColorRole.Base, QColor(25, 25, 25))
-        palette.setColor(app.palette().ColorRole.AlternateBase, QColor(53, 53, 53))
-        palette.setColor(app.palette().ColorRole.ToolTipBase, QColor(0, 0, 0))
-        palette.setColor(app.palette().ColorRole.ToolTipText, QColor(255, 255, 255))
-        palette.setColor(app.palette().ColorRole.Text, QColor(230, 230, 230))
-        palette.setColor(app.palette().ColorRole.Button, QColor(53, 53, 53))
-        palette.setColor(app.palette().ColorRole.ButtonText, QColor(255, 255, 255))
-        palette.setColor(app.palette().ColorRole.BrightText, QColor(255, 0, 0))
-        palette.setColor(app.palette().ColorRole.Link, QColor(42, 130, 218))
-        palette.setColor(app.palette().ColorRole.Highlight, QColor(42, 130, 218))
-        palette.setColor(app.palette().ColorRole.HighlightedText, QColor(0, 0, 0))
-        app.setPalette(palette)
+        if _dark_palette is None:
+            # app.palette() 每次调用都会拷贝整个调色板，只取一次
+            palette = app.palette()
+            role = QPalette.ColorRole
+            for role_name, rgb in _DARK_ROLE_RGB:
+                palette.setColor(getattr(role, role_name), QColor(*rgb))
+            _dark_palette = palette
+        app.setPalette(_dark_palette)
     else:  # light theme
         # Reset to default palette
         app.setPalette(app.style().standardPalette())
+    _last_applied_theme = theme
+
+
+class ThemeWatcher(QObject):
+    """后台定期重测系统主题：调用方始终读缓存，变化时通过信号通知。
+
+    主题配置为 auto 时，用户中途切换系统深浅色不会自动反映到缓存里；
+    这里每 30 秒在后台重测一次（stale-while-revalidate），
+    检测到变化就刷新缓存并发出 themeChanged。
+    """
+
+    themeChanged = pyqtSignal(str)
+
+    def __init__(self, parent: QObject = None, interval_ms: int = 30000):
+        super().__init__(parent)
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.VeryCoarseTimer)
+        self._timer.timeout.connect(self.recheck)
+        self._timer.start(interval_ms)
+
+    def stop_polling(self):
+        """注册到系统原生通知后停掉兜底轮询，稳态下零 CPU/IO"""
+        self._timer.stop()
+
+    def recheck(self):
+        cached = get_system_theme()
+        fresh = get_system_theme.__wrapped__()  # 绕过缓存直接探测
+        if fresh != cached:
+            logger.info("System theme changed from %s to %s", cached, fresh)
+            invalidate_theme_cache()
+            get_system_theme()  # 重新填充缓存
+            self.themeChanged.emit(fresh)
+
+
+class _WindowsThemeEventFilter(QAbstractNativeEventFilter):
+    """捕获 WM_SETTINGCHANGE("ImmersiveColorSet")，即系统深浅色切换广播"""
+
+    _WM_SETTINGCHANGE = 0x001A
+
+    def __init__(self, callback):
+        super().__init__()
+        self._callback = callback
+
+    def nativeEventFilter(self, event_type, message):
+        if event_type == b"windows_generic_MSG":
+            import ctypes.wintypes
+            msg = ctypes.wintypes.MSG.from_address(int(message))
+            if msg.message == self._WM_SETTINGCHANGE and msg.lParam:
+                try:
+                    area = ctypes.c_wchar_p(msg.lParam).value
+                except (OSError, ValueError):
+                    area = None
+                if area == "ImmersiveColorSet":
+                    self._callback()
+        return False, 0
+
+
+def install_theme_change_listener(app: QApplication, callback):
+    """注册系统原生的主题变更通知，变更时调用 callback。
+
+    成功返回需要保活的监听对象，无法注册返回 None（调用方退回定时轮询）：
+    - Windows：WM_SETTINGCHANGE 原生事件过滤器
+    - Linux/KDE：QFileSystemWatcher 盯 ~/.config/kdeglobals
+    - macOS：需要 pyobjc 订阅分布式通知，非本项目依赖，走轮询兜底
+    """
+    system = platform.system()
+
+    if system == "Windows":
+        event_filter = _WindowsThemeEventFilter(callback)
+        app.installNativeEventFilter(event_filter)
+        return event_filter
+
+    if system == "Linux":
+        import os
+        kdeglobals = os.path.expanduser('~/.config/kdeglobals')
+        if not os.path.exists(kdeglobals):
+            return None
+        watcher = QFileSystemWatcher([kdeglobals], app)
+
+        def _on_changed(path):
+            # 多数编辑器/KDE 用替换写回，inotify watch 会随旧 inode 失效，需要重挂
+            if os.path.exists(path) and path not in watcher.files():
+                watcher.addPath(path)
+            callback()
+
+        watcher.fileChanged.connect(_on_changed)
+        return watcher
+
+    return None